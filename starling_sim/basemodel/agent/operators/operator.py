@@ -811,8 +811,7 @@ class Operator(Agent):
 
         :param request: cancelled request
         """
-
-        print("hello")
+        pass
 
     def build_trip_request(
         self,
@@ -5,6 +5,7 @@ from starling_sim.basemodel.trace.events import InputEvent
 from starling_sim.basemodel.agent.operators.operator import Operator
 from starling_sim.utils.utils import json_load, validate_against_schema, add_defaults_and_validate
 from starling_sim.utils.constants import STOP_POINT_POPULATION
+from starling_sim.utils.simulation_logging import TRACED_LOGGER
 from starling_sim.utils.paths import scenario_agent_input_filepath
 from jsonschema import ValidationError
 from json import JSONDecodeError
@@ -12,6 +13,7 @@ from json import JSONDecodeError
 import traceback
 import random
 import os
+import numpy as np
 from copy import deepcopy
 
 
@@ -107,15 +109,16 @@ class DynamicInput(Traced):
         # validate against Feature schema
         validate_against_schema(feature, "geojson/Feature.json")
 
+        props = feature["properties"]
+
         # test if the feature has an 'agent_type' property
-        if "agent_type" not in feature["properties"]:
+        if "agent_type" not in props:
             raise KeyError(
                 "Error in {} : input features must contain an 'agent_type' property".format(feature)
             )
 
         # validate and set defaults using the schema corresponding to the agent type
-        agent_schema = self.agent_type_schemas[feature["properties"]["agent_type"]]
-        props = feature["properties"]
+        agent_schema = self.agent_type_schemas[props["agent_type"]]
         final_props = add_defaults_and_validate(props, agent_schema)
         feature["properties"] = final_props
 
@@ -129,29 +132,33 @@ class DynamicInput(Traced):
         where the generation time is specified as 'origin_time'.
         """
 
-        for feature in self.dynamic_feature_list:
-            # TODO : check the feature schema ? duplicate with FeatureCollection check
-
-            # see if an offset should be applied to the input origin time
-            if (
-                "early_dynamic_input" in self.sim.scenario
-                and self.sim.scenario["early_dynamic_input"]
-            ):
-                early_input_time_offset = self.sim.scenario["early_dynamic_input"]
-            else:
-                early_input_time_offset = 0
-
-            # compute the effective generation time
-            generation_time = int(feature["properties"]["origin_time"]) - early_input_time_offset
+        # see if an offset should be applied to the input origin times
+        if "early_dynamic_input" in self.sim.scenario and self.sim.scenario["early_dynamic_input"]:
+            early_input_time_offset = self.sim.scenario["early_dynamic_input"]
+        else:
+            early_input_time_offset = 0
+
+        # compute the effective generation times of the (sorted) dynamic features
+        features = self.dynamic_feature_list
+        generation_times = np.fromiter(
+            (int(feature["properties"]["origin_time"]) for feature in features),
+            dtype=np.int64,
+            count=len(features),
+        )
+        generation_times -= early_input_time_offset
 
-            # check that the generation time is positive
-            if generation_time < 0:
+        # check that the generation times are positive (only format the features if logged)
+        if TRACED_LOGGER.isEnabledFor(30):
+            for i in np.flatnonzero(generation_times < 0):
                 self.log_message(
                     "Feature {} cannot be generated at {}, "
-                    "generation at time 0 instead.".format(feature, generation_time),
+                    "generation at time 0 instead.".format(features[i], generation_times[i]),
                     30,
                 )
-                generation_time = 0
+        generation_times = np.maximum(generation_times, 0).tolist()
+
+        for feature, generation_time in zip(features, generation_times):
+            # TODO : check the feature schema ? duplicate with FeatureCollection check
 
             # wait for the next generation
             waiting_time = generation_time - self.sim.scheduler.now()
@@ -185,12 +192,11 @@ class DynamicInput(Traced):
             # create a new agent feature for each duplicate
             for i in range(nb_duplicates):
                 duplicated_feature = copy.deepcopy(feature)
-                del duplicated_feature["properties"]["duplicates"]
+                duplicated_props = duplicated_feature["properties"]
+                del duplicated_props["duplicates"]
                 # create a new id using the original agent id and the duplicate index
-                duplicated_feature["properties"]["agent_id"] = (
-                    self.DUPLICATE_AGENT_ID_FORMAT.format(
-                        original_id=input_dict["agent_id"], index=i
-                    )
+                duplicated_props["agent_id"] = self.DUPLICATE_AGENT_ID_FORMAT.format(
+                    original_id=input_dict["agent_id"], index=i
                 )
 
                 new_agents.append(self.new_agent_input(duplicated_feature))
@@ -233,32 +239,10 @@ class DynamicInput(Traced):
         # get the agent type
         agent_type = input_dict["agent_type"]
 
-        if agent_type in self.agent_type_class:
-            # get the class to generate
-            agent_class = self.agent_type_class[agent_type]
-
-            # generate the new agent
-            new_agent = agent_class.__new__(agent_class)
-
-            # initialise the new agent
-            try:
-                new_agent.__init__(self.sim, **input_dict)
-            except (TypeError, KeyError, ValidationError):
-                # if the initialisation fails, log and leave
-                self.log_message(
-                    "Instantiation of {}  failed with message :\n {}".format(
-                        self.agent_type_class[agent_type], traceback.format_exc()
-                    ),
-                    30,
-                )
-                exit(1)
-
-            # add the agent to the simulation environment
-            self.add_agent_to_simulation(new_agent, populations)
+        # get the class to generate
+        agent_class = self.agent_type_class.get(agent_type)
 
-            return new_agent
-
-        else:
+        if agent_class is None:
             self.log_message(
                 "Unknown agent_type {}. Model agent types are {}.".format(
                     agent_type, list(self.agent_type_class.keys())
@@ -267,6 +251,27 @@ class DynamicInput(Traced):
             )
             return
 
+        # generate the new agent
+        new_agent = agent_class.__new__(agent_class)
+
+        # initialise the new agent
+        try:
+            new_agent.__init__(self.sim, **input_dict)
+        except (TypeError, KeyError, ValidationError):
+            # if the initialisation fails, log and leave
+            self.log_message(
+                "Instantiation of {}  failed with message :\n {}".format(
+                    agent_class, traceback.format_exc()
+                ),
+                30,
+            )
+            exit(1)
+
+        # add the agent to the simulation environment
+        self.add_agent_to_simulation(new_agent, populations)
+
+        return new_agent
+
     def add_agent_to_simulation(self, agent, populations):
         """
         Add the agent to the simulation environment.
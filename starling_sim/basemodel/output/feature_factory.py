@@ -75,6 +75,10 @@ def get_element_line_string(geojson_output, element):
     # get agent's trace
     trace_list = agent.trace.eventList
 
+    # resolve the topologies and time limit once for the whole trace
+    graphs = geojson_output.graphs
+    time_limit = geojson_output.sim.scenario["limit"]
+
     # start processing the trace
     i = 0
 
@@ -99,11 +103,13 @@ def get_element_line_string(geojson_output, element):
             mode = event.mode
 
             # get the list of route localisations and timestamps
-            route_positions, route_timestamps = geojson_output.graphs[mode].route_event_trace(event, time_limit=geojson_output.sim.scenario["limit"])
+            route_positions, route_timestamps = graphs[mode].route_event_trace(
+                event, time_limit=time_limit
+            )
 
             # add it to the agent's lists
-            localisations = localisations + route_positions
-            timestamps = timestamps + route_timestamps
+            localisations.extend(route_positions)
+            timestamps.extend(route_timestamps)
 
         # for a position change event, add the localisations and timestamps
         elif isinstance(event, PositionChangeEvent):
@@ -111,12 +117,10 @@ def get_element_line_string(geojson_output, element):
             mode = event.mode
 
             # add it to the agent's lists
-            localisations.append(geojson_output.graphs[mode].position_localisation(event.origin))
+            localisations.append(graphs[mode].position_localisation(event.origin))
             timestamps.append(event.timestamp)
 
-            localisations.append(
-                geojson_output.graphs[mode].position_localisation(event.destination)
-            )
+            localisations.append(graphs[mode].position_localisation(event.destination))
             timestamps.append(event.timestamp + event.duration)
 
         i += 1
@@ -127,10 +131,7 @@ def get_element_line_string(geojson_output, element):
 
     # reverse lat and lon
     # position_localisation returns a (lat, lon) tuple
-    new_locs = []
-    for loc in localisations:
-        new_locs.append([loc[1], loc[0]])
-    localisations = new_locs
+    localisations = [[loc[1], loc[0]] for loc in localisations]
 
     return localisations, timestamps
 
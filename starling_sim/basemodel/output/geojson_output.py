@@ -10,15 +10,12 @@ from starling_sim.basemodel.agent.moving_agent import MovingAgent
 from starling_sim.basemodel.agent.operators.operator import Operator
 from starling_sim.basemodel.output.feature_factory import *
 from starling_sim.basemodel.agent.stations.station import Station
-from starling_sim.utils.utils import (
-    json_dump,
-    new_feature_collection,
-    gz_compression,
-    gz_decompression,
-)
+from starling_sim.utils.utils import gz_decompression, GZIP_COMPRESSION_LEVEL
 from starling_sim.utils.config import config
 
 from abc import ABC
+import gzip
+import json
 
 # list of supported icons for the geojson format
 ICON_LIST = [
@@ -60,6 +57,9 @@ class GeojsonOutput(ABC):
     #: Version of the geojson output generator
     VERSION = "X.X.X"
 
+    #: Ordered list of (element class, feature method name), the first matching class is used
+    ELEMENT_FEATURE_METHODS = []
+
     def __init__(self):
         """
         Create a new object for the generation of a geojson file.
@@ -80,9 +80,15 @@ class GeojsonOutput(ABC):
         # dict giving the information factories for each agent type
         self.information_factories = dict()
 
-        # list of features of the final output
+        # dict giving the factories updated by each event class, for each agent type
+        self.event_factories = dict()
+
+        # list of features of the final output, serialised as json strings
         self.features = None
 
+        # dict giving the feature method of each element class, filled lazily
+        self.feature_methods = dict()
+
         # current element converted as a feature
         self.current_element = None
 
@@ -120,13 +126,15 @@ class GeojsonOutput(ABC):
 
     def set_information_factories(self, information_factories):
         self.information_factories = information_factories
+        self.event_factories = dict()
 
     def add_population_features(self, population=None):
         """
         Build and add features for the given population, with additional information
         provided by the information factories.
 
-        These are added to the features attributes, used to build the final FeatureCollection.
+        These are serialised and added to the features attributes,
+        used to build the final FeatureCollection.
 
         If population is
 
@@ -151,10 +159,54 @@ class GeojsonOutput(ABC):
         self.add_factories_information()
 
         if self.current_feature is not None:
-            self.features.append(self.current_feature)
+            # serialise the feature right away instead of keeping its dict until the end
+            self.features.append(json.dumps(self.current_feature))
 
     def init_element_feature(self, element):
-        pass
+        """
+        Initialise a geojson feature for the element regarding its class.
+
+        The current_feature attribute is set with a geojson feature or None.
+
+        :param element: simulation element
+        """
+
+        self.current_element = element
+        self.current_feature = None
+
+        feature_method = self.get_feature_method(element)
+        if feature_method is not None:
+            feature_method(element)
+
+    def get_feature_method(self, element):
+        """
+        Get the method creating the feature of the given element.
+
+        The method is resolved once per element class from ELEMENT_FEATURE_METHODS.
+
+        :param element: simulation element
+
+        :return: bound feature method, or None if the element has no feature
+        """
+
+        element_class = element.__class__
+        if element_class not in self.feature_methods:
+            feature_method = None
+            for base_class, method_name in self.ELEMENT_FEATURE_METHODS:
+                if issubclass(element_class, base_class):
+                    feature_method = getattr(self, method_name)
+                    break
+            self.feature_methods[element_class] = feature_method
+
+        return self.feature_methods[element_class]
+
+    def operator_feature(self, element):
+        if len(element.servicePoints.values()) != 0:
+            self.add_population_features(list(element.servicePoints.values()))
+
+        self.current_element = element
+        if element.serviceZone is not None:
+            self.current_feature = create_multi_polygon_feature(self, element, icon_type="")
 
     def add_factories_information(self):
         pass
@@ -164,30 +216,26 @@ class GeojsonOutput(ABC):
         Write the geojson feature collection in a file.
         """
 
-        # generate a feature collection from the geojson features
-        feature_collection = new_feature_collection(self.features)
-
-        # add a version field
-        feature_collection["version"] = self.VERSION
-
         # build file path
         path = self.folder + self.filename
 
-        # check bz2 extension
+        # open the output file, compressing on the fly if necessary
         if path.endswith(".gz"):
-            to_gz = True
-            path = path[:-3]
-        else:
-            to_gz = False
-
-        # write the geojson file
-        json_dump(feature_collection, path)
-
-        # compress to bz2 if necessary
-        mimetype = "application/json"
-        if to_gz:
-            path = gz_compression(path)
+            outfile = gzip.open(path, "wt", compresslevel=GZIP_COMPRESSION_LEVEL)
             mimetype = "application/gzip"
+        else:
+            outfile = open(path, "w")
+            mimetype = "application/json"
+
+        # write the geojson feature collection, with an additional version field
+        with outfile:
+            outfile.write('{"type": "FeatureCollection", "features": [')
+            # write the features one by one rather than joining them in a single string
+            for index, feature in enumerate(self.features):
+                if index > 0:
+                    outfile.write(", ")
+                outfile.write(feature)
+            outfile.write('], "version": ' + json.dumps(self.VERSION) + "}")
 
         # signal new file to output factory
         self.sim.outputFactory.new_output_file(
@@ -201,90 +249,93 @@ class GeojsonOutput(ABC):
 class GeojsonOutput1(GeojsonOutput):
     VERSION = "1.0"
 
-    def init_element_feature(self, element):
-        """
-        Initialise a geojson feature for the element regarding its class.
-
-        The current_feature attribute is set with a geojson feature or None.
-
-        :param element: simulation element
-        """
-
-        self.current_element = element
-        self.current_feature = None
-
-        if isinstance(element, MovingAgent):
-            self.current_feature = create_line_string_feature(self, element)
+    ELEMENT_FEATURE_METHODS = [
+        (MovingAgent, "moving_agent_feature"),
+        (StopPoint, "stop_point_feature"),
+        (SpatialAgent, "spatial_agent_feature"),
+        (Operator, "operator_feature"),
+    ]
 
-        elif isinstance(element, StopPoint):
-            self.current_feature = create_point_feature(self, element, icon_type="stop_point")
+    def moving_agent_feature(self, element):
+        self.current_feature = create_line_string_feature(self, element)
 
-        elif isinstance(element, SpatialAgent):
-            self.current_feature = create_point_feature(self, element)
+    def stop_point_feature(self, element):
+        self.current_feature = create_point_feature(self, element, icon_type="stop_point")
 
-        elif isinstance(element, Operator):
-            if len(element.servicePoints.values()) != 0:
-                self.add_population_features(list(element.servicePoints.values()))
-
-            self.current_element = element
-            if element.serviceZone is not None:
-                self.current_feature = create_multi_polygon_feature(self, element, icon_type="")
+    def spatial_agent_feature(self, element):
+        self.current_feature = create_point_feature(self, element)
 
     def add_factories_information(self):
         if not isinstance(self.current_element, Agent):
             return
 
-        if self.current_element.type not in self.information_factories:
+        agent_type = self.current_element.type
+        factories = self.information_factories.get(agent_type)
+        if factories is None:
             return
 
-        information_dict = dict()
-        factories = self.information_factories[self.current_element.type]
+        # bind the agent and lookup method outside of the event loop
+        agent = self.current_element
+        get_event_factories = self.get_event_factories
+        for event in agent.trace.eventList:
+            for factory in get_event_factories(agent_type, event.__class__):
+                factory.update(event, agent)
 
-        for event in self.current_element.trace.eventList:
-            for factory in factories:
-                factory.update(event, self.current_element)
+        self.current_feature["properties"]["information"] = {
+            factory.key: factory.get_dict() for factory in factories
+        }
+
+    def get_event_factories(self, agent_type, event_class):
+        """
+        Get the information factories of the agent type that are updated by the event class.
+
+        The factories are filtered once per (agent type, event class) using their EVENT_TYPES.
 
-        for factory in factories:
-            information_dict[factory.key] = factory.get_dict()
+        :param agent_type: type of the agent
+        :param event_class: class of the event
 
-        self.current_feature["properties"]["information"] = information_dict
+        :return: list of information factories
+        """
+
+        key = (agent_type, event_class)
+        if key not in self.event_factories:
+            self.event_factories[key] = [
+                factory
+                for factory in self.information_factories[agent_type]
+                if factory.EVENT_TYPES is None or issubclass(event_class, factory.EVENT_TYPES)
+            ]
+
+        return self.event_factories[key]
 
 
 class GeojsonOutput0(GeojsonOutput):
     VERSION = "0.1"
 
-    def init_element_feature(self, element):
-        self.current_element = element
-        self.current_feature = None
-
-        if isinstance(element, Operator):
-            if len(element.servicePoints.values()) != 0:
-                self.add_population_features(list(element.servicePoints.values()))
-
-            self.current_element = element
-            if element.serviceZone is not None:
-                self.current_feature = create_multi_polygon_feature(self, element, icon_type="")
-
-        elif isinstance(element, StopPoint):
-            self.current_feature = create_point_feature(self, element, icon_type="stop_point")
-            self.current_feature["properties"]["position"] = [
-                self.current_feature["geometry"]["coordinates"]
-            ] * 2
-            self.current_feature["properties"]["duration"] = [0, 99999]
-
-        elif isinstance(element, Station):
-            self.current_feature = create_point_feature(self, element, icon_type="station")
-            self.current_feature["properties"]["position"] = [
-                self.current_feature["geometry"]["coordinates"]
-            ] * 2
-            self.current_feature["properties"]["duration"] = [0, 99999]
-
-        elif isinstance(element, SpatialAgent):
-            self.current_feature = create_point_feature(self, element)
-            localisations, timestamps = get_element_line_string(self, element)
-            self.current_feature["geometry"]["coordinates"] = localisations[0]
-            self.current_feature["properties"]["position"] = localisations
-            self.current_feature["properties"]["duration"] = timestamps
+    ELEMENT_FEATURE_METHODS = [
+        (Operator, "operator_feature"),
+        (StopPoint, "stop_point_feature"),
+        (Station, "station_feature"),
+        (SpatialAgent, "spatial_agent_feature"),
+    ]
+
+    def stop_point_feature(self, element):
+        self.static_point_feature(element, "stop_point")
+
+    def station_feature(self, element):
+        self.static_point_feature(element, "station")
+
+    def static_point_feature(self, element, icon_type):
+        self.current_feature = create_point_feature(self, element, icon_type=icon_type)
+        properties = self.current_feature["properties"]
+        properties["position"] = [self.current_feature["geometry"]["coordinates"]] * 2
+        properties["duration"] = [0, 99999]
+
+    def spatial_agent_feature(self, element):
+        self.current_feature = create_point_feature(self, element)
+        localisations, timestamps = get_element_line_string(self, element)
+        self.current_feature["geometry"]["coordinates"] = localisations[0]
+        self.current_feature["properties"]["position"] = localisations
+        self.current_feature["properties"]["duration"] = timestamps
 
 
 # function for the creation of a geojson output instance of the correct version
@@ -2,6 +2,7 @@ from starling_sim.basemodel.trace.events import *
 from starling_sim.basemodel.agent.vehicles.vehicle import Vehicle
 from starling_sim.basemodel.agent.stations.vehicle_sharing_station import VehicleSharingStation
 from starling_sim.utils.constants import END_OF_SIM_LEAVE
+from starling_sim.utils.utils import get_sec
 
 from abc import ABC
 import logging
@@ -18,6 +19,9 @@ class InformationFactory(ABC):
     #: Default key used in the 'information' property
     DEFAULT_KEY = "key"
 
+    #: Event classes that can update the information, None for all events
+    EVENT_TYPES = None
+
     def __init__(self, information_key=None):
         """
         Initialise the structures containing the information to add to each feature.
@@ -97,6 +101,8 @@ class InformationFactory(ABC):
         """
         Update the information structures according to the event content and agent.
 
+        Only called with events that are instances of EVENT_TYPES.
+
         :param event:
         :param agent:
         """
@@ -110,14 +116,17 @@ class ActivityInformation(InformationFactory):
 
     DEFAULT_KEY = "activity"
 
+    EVENT_TYPES = (InputEvent, LeaveSimulationEvent)
+
     def update(self, event, agent):
+        # activity starts after the input event and ends before the leave event
         if isinstance(event, InputEvent):
             self.append_value_and_timestamp(0, 0)
 
             start_of_activity_timestamps = agent.trace.eventList[1].timestamp
             self.append_value_and_timestamp(1, start_of_activity_timestamps)
 
-        if isinstance(event, LeaveSimulationEvent):
+        elif isinstance(event, LeaveSimulationEvent):
             end_of_activity_timestamps = agent.trace.eventList[-2].timestamp
 
             self.append_value_and_timestamp(0, end_of_activity_timestamps)
@@ -130,34 +139,44 @@ class StockInformation(InformationFactory):
 
     DEFAULT_KEY = "stock"
 
+    EVENT_TYPES = (InputEvent, RequestEvent, GetVehicleEvent, LeaveVehicleEvent)
+
+    def __init__(self, information_key=None):
+        super().__init__(information_key)
+
+        # current stock of the agent, i.e. the last appended value
+        self.stock = 0
+
     def update(self, event, agent):
         if isinstance(agent, VehicleSharingStation):
             if isinstance(event, InputEvent):
-                self.append_value_and_timestamp(agent.initial_stock, 0)
+                self.stock = agent.initial_stock
+                self.append_value_and_timestamp(self.stock, 0)
 
             elif isinstance(event, RequestEvent) and event.request.success:
                 request = event.request
 
                 if request.type == request.GET_REQUEST:
-                    value = self.values[-1] - 1
+                    self.stock -= 1
                 elif request.type == request.PUT_REQUEST:
-                    value = self.values[-1] + 1
+                    self.stock += 1
                 else:
                     return
 
-                self.append_value_and_timestamp(value, event.timestamp)
+                self.append_value_and_timestamp(self.stock, event.timestamp)
 
         elif isinstance(agent, Vehicle):
             if isinstance(event, InputEvent):
-                self.append_value_and_timestamp(0, 0)
+                self.stock = 0
+                self.append_value_and_timestamp(self.stock, 0)
 
             elif isinstance(event, GetVehicleEvent):
-                value = self.values[-1] + 1
-                self.append_value_and_timestamp(value, event.timestamp)
+                self.stock += 1
+                self.append_value_and_timestamp(self.stock, event.timestamp)
 
             elif isinstance(event, LeaveVehicleEvent):
-                value = self.values[-1] - 1
-                self.append_value_and_timestamp(value, event.timestamp)
+                self.stock -= 1
+                self.append_value_and_timestamp(self.stock, event.timestamp)
 
 
 class DelayInformation(InformationFactory):
@@ -167,17 +186,46 @@ class DelayInformation(InformationFactory):
 
     DEFAULT_KEY = "delay"
 
+    EVENT_TYPES = (InputEvent, StopEvent)
+
+    def __init__(self, information_key=None):
+        super().__init__(information_key)
+
+        # theoretical departure times of each operator, {(trip_id, stop_id): departure_time}
+        self.departure_times = dict()
+
+    def get_departure_times(self, operator):
+        """
+        Get the theoretical departure times of the operator, built once from its timetable.
+
+        The first departure is kept when a trip serves the same stop several times.
+
+        :param operator: public transport operator
+
+        :return: dict of the form {(trip_id, stop_id): departure_time}
+        """
+
+        if operator.id not in self.departure_times:
+            stop_times = operator.service_info.get_stop_times()
+            stop_times = stop_times.dropna(subset=["departure_time"])
+            stop_times = stop_times.drop_duplicates(["trip_id", "stop_id"])
+            self.departure_times[operator.id] = dict(
+                zip(
+                    zip(stop_times["trip_id"], stop_times["stop_id"]),
+                    map(get_sec, stop_times["departure_time"]),
+                )
+            )
+
+        return self.departure_times[operator.id]
+
     def update(self, event, agent):
         if isinstance(event, InputEvent):
             self.append_value_and_timestamp(0, event.timestamp)
 
         elif isinstance(event, StopEvent):
             # get the theoretical departure time
-            service_info = agent.operator.service_info
-            stop_times = service_info.get_stop_times()
-            theo_departure_time = stop_times[
-                (stop_times["trip_id"] == event.trip) & (stop_times["stop_id"] == event.stop.id)
-            ]["departure_time_num"].values[0]
+            departure_times = self.get_departure_times(agent.operator)
+            theo_departure_time = departure_times[(event.trip, event.stop.id)]
 
             # compute the delay
             delay = int((event.pickup_time - theo_departure_time) / float(60))
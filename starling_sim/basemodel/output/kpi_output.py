@@ -1,46 +1,73 @@
 from starling_sim.basemodel.output.kpis import KPI
+from starling_sim.utils.utils import GZIP_COMPRESSION_LEVEL
+from starling_sim.utils.config import config
 
 import logging
+import multiprocessing
 import pandas as pd
 import os
+import sys
 import math
-from datetime import datetime, time, timedelta
-
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 
 KEY_TIME_RANGE = "timeRange"
 
+# kpi output and agents inherited by the forked kpi processes
+_forked_kpi_evaluation = None
+
+
+def _compute_forked_agents_kpis(agents_slice):
+    """
+    Evaluate the KPIs of a slice of the agents, in a forked process.
+
+    :param agents_slice: slice of the agents list
+
+    :return: dict containing the rows of indicators evaluated on the agents
+    """
+    kpi_output, agents = _forked_kpi_evaluation
+    return kpi_output.compute_agents_kpis(agents[agents_slice])
+
 
 class KpiOutput:
     def __init__(self, population_names, kpi_list, kpi_name=None):
         # simulation model access
         self.sim = None
 
+        # population of agent to evaluate, a single population name is put in a list
+        if not isinstance(population_names, list):
+            population_names = [population_names]
+        self.population_names = population_names
+        self.populations = None
+
         # name of the kpi, will compose the kpi filename : <kpi_name>.csv
         if kpi_name is None:
-            if isinstance(population_names, list):
-                self.name = "_&_".join(population_names) + "_kpi"
-            else:
-                self.name = population_names + "_kpi"
+            self.name = "_&_".join(population_names) + "_kpi"
         else:
             self.name = kpi_name
 
-        # population of agent to evaluate
-        self.population_names = population_names
-        self.populations = None
-
         # list of kpi to evaluate the given agents
         self.kpi_list = kpi_list
         self.columns = None
 
-        # dict containing kpi values
+        # dict giving the update methods of the kpis concerned by each event class
+        self.event_kpi_updates = dict()
+
+        # columns of kpi values, only set while the agents are evaluated
         self.kpi_rows = None
 
         # indicates if KpiOutput is time profiled
         self.time_profiling = None
 
+        # time ranges of the profile, formatted as times of the day
+        self.time_ranges = None
+
         # output file
         self.filename = None
         self.folder = None
+        self.path = None
+        self.mimetype = None
+        self.compression = None
 
     def setup(self, filename, folder, simulation_model):
         """
@@ -58,6 +85,15 @@ class KpiOutput:
         self.filename = filename
         self.folder = folder
 
+        # resolve the output path and its compression once
+        self.path = str(os.path.join(folder, filename))
+        if self.path.endswith("gz"):
+            self.compression = {"method": "gzip", "compresslevel": GZIP_COMPRESSION_LEVEL}
+            self.mimetype = "application/gzip"
+        else:
+            self.compression = "infer"
+            self.mimetype = "text/csv"
+
         # setup kpis and get columns
         columns = [KPI.KEY_ID]
         time_profiling = None
@@ -75,17 +111,20 @@ class KpiOutput:
             columns += kpi.export_keys
 
         self.time_profiling = time_profiling
+        self.event_kpi_updates = dict()
         if self.time_profiling:
             columns.insert(1, KEY_TIME_RANGE)
+            # format the time ranges once, they are the same for all agents
+            self.time_ranges = [
+                (datetime.min + timedelta(seconds=x)).strftime("%H:%M:%S")
+                for x in self.kpi_list[0].profile
+            ]
         self.columns = columns
 
-        if isinstance(self.population_names, list):
-            self.populations = [
-                simulation_model.agentPopulation[population_name]
-                for population_name in self.population_names
-            ]
-        else:
-            self.populations = [simulation_model.agentPopulation[self.population_names]]
+        self.populations = [
+            simulation_model.agentPopulation[population_name]
+            for population_name in self.population_names
+        ]
 
     def write_kpi_table(self):
         """
@@ -94,30 +133,25 @@ class KpiOutput:
         The KPIs evaluated are defined by the kpi_list attribute
         """
 
+        # do not evaluate the kpis if there is no agent to evaluate
+        if all(len(population) == 0 for population in self.populations):
+            return
+
         # build the KPI table for all agents of each population
         kpi_table = self.build_kpi_table()
 
-        if self.time_profiling:
-            kpi_table[KEY_TIME_RANGE] = kpi_table[KEY_TIME_RANGE].apply(
-                lambda x: (datetime.min + timedelta(seconds=x)).strftime("%H:%M:%S")
-            )
-
         # do not generate a kpi output if the kpi table is empty
         if kpi_table.empty:
             return
 
-        path = str(os.path.join(self.folder, self.filename))
         try:
             # write the dataframe into a csv file
-            kpi_table.to_csv(path, sep=";", index=False)
+            kpi_table.to_csv(self.path, sep=";", index=False, compression=self.compression)
 
             # signal new file to output factory
-            mimetype = "text/csv"
-            if path.endswith("gz"):
-                mimetype = "application/gzip"
             self.sim.outputFactory.new_output_file(
-                path,
-                mimetype,
+                self.path,
+                self.mimetype,
                 compressed_mimetype="text/csv",
                 content="kpi",
                 subject=self.name,
@@ -125,7 +159,7 @@ class KpiOutput:
 
         except KeyError as e:
             logging.warning(
-                "Could not generate kpi output {}, " "error occurred : {}".format(path, e)
+                "Could not generate kpi output {}, " "error occurred : {}".format(self.path, e)
             )
 
     def build_kpi_table(self) -> pd.DataFrame:
@@ -137,42 +171,139 @@ class KpiOutput:
         :return: KPI DataFrame
         """
 
-        kpi_tables = []
-        # compute kpi tables for each population dict
-        for population in self.populations:
-            # compute a kpi table for each agent of the population
-            for agent in population.values():
-                kpi_tables.append(self.compute_agent_kpis(agent))
+        # list the agents of all populations
+        agents = [agent for population in self.populations for agent in population.values()]
+
+        # evaluate the kpis of the agents, in several processes if asked
+        # (the processes are forked, which is only safe on Linux)
+        nb_processes = min(config["kpi_processes"], len(agents))
+        if nb_processes > 1 and sys.platform.startswith("linux"):
+            kpi_columns = self.compute_agents_kpis_in_processes(agents, nb_processes)
+        else:
+            kpi_columns = self.compute_agents_kpis(agents)
+
+        # profiled kpis add a row per time range for each agent
+        if self.time_profiling:
+            kpi_columns[KEY_TIME_RANGE] = self.time_ranges * len(agents)
+
+        # build the DataFrame in one go
+        result = pd.DataFrame(kpi_columns, columns=self.columns)
+
+        # missing values (None) would turn numeric columns into floats, keep them as objects
+        for key, values in kpi_columns.items():
+            if result[key].dtype.kind == "f" and None in values:
+                result[key] = pd.Series(values, dtype=object)
 
-        result = pd.concat(kpi_tables)
         return result
 
+    def compute_agents_kpis(self, agents):
+        """
+        Build a dict containing the indicators evaluated on the given agents.
+
+        :param agents: list of agents on which KPIs are evaluated
+
+        :return: dict containing the rows of indicators, in the order of the agents
+        """
+
+        # the kpis of each agent append their rows to the same columns
+        self.kpi_rows = {key: [] for key in self.columns}
+        for agent in agents:
+            self.compute_agent_kpis(agent)
+
+        # only keep the columns until they are used to build the table
+        kpi_rows = self.kpi_rows
+        self.kpi_rows = None
+
+        return kpi_rows
+
+    def compute_agents_kpis_in_processes(self, agents, nb_processes):
+        """
+        Build a dict containing the indicators evaluated on the given agents, using forked processes.
+
+        The processes inherit the agents, and evaluate the KPIs of contiguous slices of the
+        agents list. Only the resulting rows are sent back, and concatenated in the agents order.
+
+        :param agents: list of agents on which KPIs are evaluated
+        :param nb_processes: number of processes
+
+        :return: dict containing the rows of indicators, in the order of the agents
+        """
+        global _forked_kpi_evaluation
+
+        # split the agents in a few slices per process
+        slice_size = math.ceil(len(agents) / (nb_processes * 4))
+        agents_slices = [slice(i, i + slice_size) for i in range(0, len(agents), slice_size)]
+
+        _forked_kpi_evaluation = (self, agents)
+        try:
+            with ProcessPoolExecutor(
+                nb_processes, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                slices_rows = list(executor.map(_compute_forked_agents_kpis, agents_slices))
+        finally:
+            _forked_kpi_evaluation = None
+
+        # concatenate the rows of the slices
+        kpi_columns = {key: [] for key in self.columns}
+        for slice_rows in slices_rows:
+            for key, values in slice_rows.items():
+                kpi_columns[key].extend(values)
+
+        return kpi_columns
+
     def compute_agent_kpis(self, agent):
         """
-        Build a DataFrame containing indicator evaluated on the given agent.
+        Evaluate the indicators on the given agent and append them to the kpi_rows attribute.
 
-        The DataFrame columns are defined by the KPIs `keys` attributes,
-        with and additional column for the agent id, and an optional column
-        for time profiling.
+        The kpi_rows keys are defined by the KPIs `keys` attributes,
+        with and additional key for the agent id, and an optional key
+        for time profiling. Each key is associated to a list of values.
 
-        The DataFrame can contain several rows, for instance when KPIs
-        are profiled by time.
+        An agent can add several rows, for instance when KPIs
+        are profiled by time. The time profiling column is left empty,
+        it is filled for all agents when building the table.
 
         :param agent: Agent on which KPIs are evaluated
+        """
+
+        last_column = self.kpi_rows[self.columns[-1]]
+        nb_rows = len(last_column)
+
+        # get the agent's events in chronological order, once for all kpis
+        events = agent.trace.get_sorted_events()
+
+        # evaluate indicators on agent, browsing its events once for all kpis
+        kpi_list = self.kpi_list
+        for kpi in kpi_list:
+            kpi.reset_for_agent(agent)
 
-        :return: DataFrame containing indicators evaluated on the given agent
+        get_event_kpi_updates = self.get_event_kpi_updates
+        for event in events:
+            for kpi_update in get_event_kpi_updates(event.__class__):
+                kpi_update(event)
+
+        for kpi in kpi_list:
+            kpi.end_of_events()
+
+        # repeat the agent id on each of the rows added by the kpis
+        self.kpi_rows[KPI.KEY_ID].extend([agent.id] * (len(last_column) - nb_rows))
+
+    def get_event_kpi_updates(self, event_class):
         """
+        Get the update methods of the kpis that are concerned by the event class.
 
-        self.kpi_rows = {key: [] for key in self.columns}
+        The kpis are filtered once per event class using their EVENT_TYPES.
 
-        # evaluate indicators on agent
-        for kpi in self.kpi_list:
-            kpi.evaluate_for_agent(agent)
+        :param event_class: class of the event
 
-        self.kpi_rows[KPI.KEY_ID] = agent.id
-        if self.time_profiling:
-            self.kpi_rows[KEY_TIME_RANGE] = self.kpi_list[0].profile
+        :return: list of kpi update methods
+        """
 
-        res = pd.DataFrame(self.kpi_rows, columns=self.columns)
+        if event_class not in self.event_kpi_updates:
+            self.event_kpi_updates[event_class] = [
+                kpi.update_from_event
+                for kpi in self.kpi_list
+                if kpi.EVENT_TYPES is None or issubclass(event_class, kpi.EVENT_TYPES)
+            ]
 
-        return res
+        return self.event_kpi_updates[event_class]
@@ -22,6 +22,9 @@ class KPI(ABC):
     # indicates if this KPI is compatible with time profiling
     PROFILE_COMPATIBILITY = True
 
+    #: Event classes that can update the indicators, None for all events
+    EVENT_TYPES = None
+
     #: **agentId**: id of the agent
     KEY_ID = "agentId"
 
@@ -50,24 +53,32 @@ class KPI(ABC):
         # time profiling
         self.profile = None
         self.current_profile_index = 0
+        # start of the next profile range, None if there is no later range
+        self.next_profile_timestamp = None
 
     @property
     def export_keys(self):
         return self._export_keys if self._export_keys is not None else self.keys
 
-    def _init_keys(self):
-        # return class attributes starting with "KEY_"
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # list the class attributes starting with "KEY_" once per class
         keys = list(
             map(
                 lambda x: x[1],
                 filter(
                     lambda x: x[0].startswith("KEY_"),
-                    inspect.getmembers(self.__class__, lambda a: not (inspect.isroutine(a))),
+                    inspect.getmembers(cls, lambda a: not (inspect.isroutine(a))),
                 ),
             )
         )
-        keys.remove(self.KEY_ID)
-        return keys
+        keys.remove(cls.KEY_ID)
+        cls._DECLARED_KEYS = keys
+
+    def _init_keys(self):
+        # return class attributes starting with "KEY_"
+        return list(self._DECLARED_KEYS)
 
     def new_indicator_dict(self):
         """
@@ -122,9 +133,10 @@ class KPI(ABC):
         self.reset_for_agent(agent)
 
         # browse agent's events in chronological order
-        events = sorted(agent.trace.eventList, key=lambda x: x.timestamp)
+        events = agent.trace.get_sorted_events()
+        update_from_event = self.update_from_event
         for event in events:
-            self.update_from_event(event)
+            update_from_event(event)
 
         # signal end of events
         self.end_of_events()
@@ -141,6 +153,7 @@ class KPI(ABC):
         self.current_timestamp = 0
         self.indicator_dict = self.new_indicator_dict()
         self.current_profile_index = 0
+        self.next_profile_timestamp = self.get_next_profile_timestamp()
 
     def end_of_events(self):
         """
@@ -159,6 +172,7 @@ class KPI(ABC):
         Add a new row with indicators of current interval and jump to the next one.
         """
         self.current_profile_index += 1
+        self.next_profile_timestamp = self.get_next_profile_timestamp()
         self.new_kpi_row()
 
     def new_kpi_row(self):
@@ -168,12 +182,24 @@ class KPI(ABC):
         Indicators are reset after their data has been added to a row.
         """
         # add kpi row
+        kpi_rows = self.kpi_output.kpi_rows
+        indicator_dict = self.indicator_dict
         for key in self.export_keys:
-            self.kpi_output.kpi_rows[key].append(self.indicator_dict[key])
+            kpi_rows[key].append(indicator_dict[key])
 
         # reset indicators
         self.indicator_dict = self.new_indicator_dict()
 
+    def get_next_profile_timestamp(self):
+        """
+        Get the start of the profile interval following the current one.
+
+        :return: start of the next profile interval, or None if there is none
+        """
+        if self.profile and self.current_profile_index < len(self.profile) - 1:
+            return self.profile[self.current_profile_index + 1]
+        return None
+
     def is_in_later_profile(self, timestamp):
         """
         Test if time profiling is enabled and if the given timestamp is in a later profile interval.
@@ -181,11 +207,7 @@ class KPI(ABC):
         :param timestamp:
         :return: boolean indicating if timestamp in a later profile interval
         """
-        return (
-            self.profile
-            and self.current_profile_index < len(self.profile) - 1
-            and timestamp >= self.profile[self.current_profile_index + 1]
-        )
+        return self.next_profile_timestamp is not None and timestamp >= self.next_profile_timestamp
 
     def update_from_event(self, event: Event):
         """
@@ -196,16 +218,15 @@ class KPI(ABC):
 
         :param event: Event instance
         """
-        assert (
-            event.timestamp >= self.current_timestamp
-        ), "Event list should be ordered chronologically"
+        timestamp = event.timestamp
+        assert timestamp >= self.current_timestamp, "Event list should be ordered chronologically"
 
         # if event is in a later profile range, jump to it
-        while self.is_in_later_profile(event.timestamp):
+        while self.is_in_later_profile(timestamp):
             self.end_of_profile_range()
 
         # update timestamp
-        self.current_timestamp = event.timestamp
+        self.current_timestamp = timestamp
 
         self._update(event)
 
@@ -219,9 +240,10 @@ class KPI(ABC):
 
         # while current profile does not contain profile end, add proportioned indicators and jump to next profile
         current_timestamp = event.timestamp
-        while self.is_in_later_profile(event.timestamp + total_duration):
+        end_timestamp = current_timestamp + total_duration
+        while self.is_in_later_profile(end_timestamp):
             # evaluate the duration spent in the current profile
-            duration_current = self.profile[self.current_profile_index + 1] - current_timestamp
+            duration_current = self.next_profile_timestamp - current_timestamp
 
             # evaluate indicators for the current profile range
             self.evaluate_indicators_on_profile_range(event, current_timestamp, duration_current)
@@ -229,7 +251,7 @@ class KPI(ABC):
             self.end_of_profile_range()
             current_timestamp = self.profile[self.current_profile_index]
 
-        duration_last = event.timestamp + total_duration - current_timestamp
+        duration_last = end_timestamp - current_timestamp
         self.evaluate_indicators_on_profile_range(event, current_timestamp, duration_last)
 
     def evaluate_indicators_on_profile_range(self, event, current_timestamp, duration_on_range):
@@ -248,6 +270,8 @@ class KPI(ABC):
         """
         Update the kpi values according to the event content and the agent.
 
+        The KpiOutput only calls this method with events that are instances of EVENT_TYPES.
+
         :param event: processed event
         :return:
         """
@@ -263,18 +287,30 @@ class MoveKPI(KPI):
     #: **{mode}Time**: time travelled in <mode> [seconds]
     SUFFIX_KEY_TIME = "{mode}Time"
 
+    EVENT_TYPES = (MoveEvent,)
+
     def __init__(self, **kwargs):
         self.modes = []
+        # (time key, distance key) of each mode
+        self.mode_keys = dict()
         super().__init__(**kwargs)
 
     def _indicators_setup(self, simulation_model):
         self.modes = list(simulation_model.environment.topologies.keys())
+        self.mode_keys = {
+            mode: (
+                self.SUFFIX_KEY_TIME.format(mode=mode),
+                self.SUFFIX_KEY_DISTANCE.format(mode=mode),
+            )
+            for mode in self.modes
+        }
 
     def _init_keys(self):
         keys = []
         for mode in self.modes:
-            keys.append(self.SUFFIX_KEY_DISTANCE.format(mode=mode))
-            keys.append(self.SUFFIX_KEY_TIME.format(mode=mode))
+            time_key, distance_key = self.mode_keys[mode]
+            keys.append(distance_key)
+            keys.append(time_key)
         return keys
 
     def _update(self, event):
@@ -295,8 +331,9 @@ class MoveKPI(KPI):
             else:
                 duration = duration_on_range
                 distance = round(event.distance * duration_on_range / event.duration)
-        self.indicator_dict[self.SUFFIX_KEY_TIME.format(mode=event.mode)] += duration
-        self.indicator_dict[self.SUFFIX_KEY_DISTANCE.format(mode=event.mode)] += distance
+        time_key, distance_key = self.mode_keys[event.mode]
+        self.indicator_dict[time_key] += duration
+        self.indicator_dict[distance_key] += distance
 
 
 class WaitKPI(KPI):
@@ -307,6 +344,8 @@ class WaitKPI(KPI):
     #: **waitTime**: total traced wait time [seconds]
     KEY_WAIT = "waitTime"
 
+    EVENT_TYPES = (WaitEvent, RequestEvent)
+
     def _update(self, event):
         if isinstance(event, WaitEvent) or isinstance(event, RequestEvent):
             self.add_proportioned_indicators(event)
@@ -323,6 +362,8 @@ class GetVehicleKPI(KPI):
     #: **nbGetVehicle**: number of uses of the vehicle
     KEY_GET_VEHICLE = "nbGetVehicle"
 
+    EVENT_TYPES = (GetVehicleEvent,)
+
     def _update(self, event):
         """
         Add a new use for each GetVehicleEvent
@@ -352,6 +393,8 @@ class SuccessKPI(KPI):
     #: **nbSuccessRequest**: number of successful requests
     KEY_SUCCESS_REQUEST = "nbSuccessRequest"
 
+    EVENT_TYPES = (RequestEvent,)
+
     def _init_keys(self):
         return [
             self.KEY_FAILED_GET,
@@ -398,6 +441,8 @@ class StaffOperationKPI(KPI):
     #: **nbSuccessPutStaff**: number of successful puts by staff
     KEY_SUCCESS_PUT_STAFF = "nbSuccessPutStaff"
 
+    EVENT_TYPES = (StaffOperationEvent,)
+
     def _init_keys(self):
         return [
             self.KEY_FAILED_GET_STAFF,
@@ -445,6 +490,8 @@ class OccupationKPI(KPI):
     #: **maxStock**: maximum stock
     KEY_MAX_STOCK = "maxStock"
 
+    EVENT_TYPES = (InputEvent, LeaveSimulationEvent)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -492,11 +539,15 @@ class OccupationKPI(KPI):
         return self.currentStock
 
     def end_of_profile_range(self):
-        if self.current_profile_index < len(self.profile) - 1:
-            self.update_timestamp(self.profile[self.current_profile_index + 1] - 1)
+        if self.next_profile_timestamp is not None:
+            self.update_timestamp(self.next_profile_timestamp - 1)
         super().end_of_profile_range()
 
     def update_timestamp(self, timestamp):
+        # nothing to add if no time has passed and no distance was travelled
+        if timestamp == self.previousTime and not self.currentDistance:
+            return
+
         # compute time spent with last stock
         duration = int(timestamp - self.previousTime)
 
@@ -564,6 +615,8 @@ class StationOccupationKPI(OccupationKPI):
     and the stock relative time spent in the station
     """
 
+    EVENT_TYPES = OccupationKPI.EVENT_TYPES + (RequestEvent, StaffOperationEvent)
+
     def _init_keys(self):
         return [self.KEY_EMPTY_TIME, self.KEY_FULL_TIME, self.KEY_STOCK_TIME]
 
@@ -613,6 +666,8 @@ class VehicleOccupationKPI(OccupationKPI):
     and a passenger relative distance and time.
     """
 
+    EVENT_TYPES = OccupationKPI.EVENT_TYPES + (GetVehicleEvent, LeaveVehicleEvent, MoveEvent)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.currentDistance = 0
@@ -671,6 +726,8 @@ class ChargeKPI(KPI):
 
     PROFILE_COMPATIBILITY = False
 
+    EVENT_TYPES = (StopEvent,)
+
     #: **tripId**: gtfs trip id
     KEY_TRIP_ID = "tripId"
     #: **time**: simulation timestamp of board/un-board
@@ -689,7 +746,10 @@ class ChargeKPI(KPI):
         super().__init__(**kwargs)
 
     def new_indicator_dict(self):
-        return dict()
+        # all indicators are set before each row, so the same dict can be reused
+        if self.indicator_dict is None:
+            return dict()
+        return self.indicator_dict
 
     def _init_keys(self):
         return [
@@ -711,23 +771,26 @@ class ChargeKPI(KPI):
         """
 
         if isinstance(event, StopEvent):
+            if not event.pickups and not event.dropoffs and self.non_empty_only:
+                return
+
+            # the stop information is common to the rows of the event, and kept by the reused dict
+            self.update_stop_information(event)
+
             # add a row for each stop type
             if event.dropoffs:
-                self.update_stop_information(event)
                 self.indicator_dict[self.KEY_TIME] = event.dropoff_time
                 self.indicator_dict[self.KEY_BOARD_TYPE] = -1
                 self.indicator_dict[self.KEY_VALUE] = len(event.dropoffs)
                 self.new_kpi_row()
             if event.pickups:
-                self.update_stop_information(event)
                 self.indicator_dict[self.KEY_TIME] = event.pickup_time
                 self.indicator_dict[self.KEY_BOARD_TYPE] = 1
                 self.indicator_dict[self.KEY_VALUE] = len(event.pickups)
                 self.new_kpi_row()
 
             # add a row even if stop is empty if asked
-            if not event.pickups and not event.dropoffs and not self.non_empty_only:
-                self.update_stop_information(event)
+            if not event.pickups and not event.dropoffs:
                 self.indicator_dict[self.KEY_TIME] = event.timestamp
                 self.indicator_dict[self.KEY_BOARD_TYPE] = 0
                 self.indicator_dict[self.KEY_VALUE] = 0
@@ -758,8 +821,9 @@ class PublicTransportChargeKPI(ChargeKPI):
     KEY_TRIP_DIRECTION = "tripDirection"
 
     def __init__(self, **kwargs):
-        self.trips = None
-        self.routes = None
+        # route id and direction of the gtfs trips
+        self.trip_routes = dict()
+        self.trip_directions = dict()
 
         super().__init__(**kwargs)
 
@@ -767,14 +831,20 @@ class PublicTransportChargeKPI(ChargeKPI):
         return [self.KEY_ROUTE_ID, self.KEY_TRIP_DIRECTION] + super()._init_keys()
 
     def _indicators_setup(self, simulation_model):
-        self.trips = simulation_model.gtfs.trips
-        self.routes = simulation_model.gtfs.routes
+        trips = simulation_model.gtfs.trips
+        self.trip_routes = get_column_mapping(trips, "trip_id", "route_id")
+        self.trip_directions = get_column_mapping(trips, "trip_id", "direction_id")
 
     def update_stop_information(self, event):
         super().update_stop_information(event)
 
-        self.indicator_dict[self.KEY_ROUTE_ID] = get_route_id_of_trip(self.trips, event.trip, event)
-        self.indicator_dict[self.KEY_TRIP_DIRECTION] = get_direction_of_trip(self.trips, event.trip)
+        trip_id = event.trip
+        self.indicator_dict[self.KEY_ROUTE_ID] = get_route_id_from_mapping(
+            self.trip_routes, trip_id, event
+        )
+        self.indicator_dict[self.KEY_TRIP_DIRECTION] = get_direction_from_mapping(
+            self.trip_directions, trip_id
+        )
 
 
 class ServiceKPI(KPI):
@@ -785,6 +855,8 @@ class ServiceKPI(KPI):
     #: **serviceDuration**: vehicle service duration [seconds]
     KEY_SERVICE_DURATION = "serviceDuration"
 
+    EVENT_TYPES = (ServiceEvent,)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.last_service_marker = None
@@ -794,8 +866,8 @@ class ServiceKPI(KPI):
         super().reset_for_agent(agent)
 
     def end_of_profile_range(self):
-        if self.current_profile_index < len(self.profile) - 1:
-            self.update_indicator(self.profile[self.current_profile_index + 1] - 1)
+        if self.next_profile_timestamp is not None:
+            self.update_indicator(self.next_profile_timestamp - 1)
         super().end_of_profile_range()
 
     def update_indicator(self, timestamp):
@@ -837,6 +909,15 @@ class TransferKPI(KPI):
 
     PROFILE_COMPATIBILITY = False
 
+    EVENT_TYPES = (
+        InputEvent,
+        WaitEvent,
+        MoveEvent,
+        RequestEvent,
+        StopEvent,
+        DestinationReachedEvent,
+    )
+
     #: **walkDistance**: walk distance of transfer [meters]
     KEY_WALK_DIST = "walkDistance"
     #: **walkTime**: walk time of transfer [seconds]
@@ -859,8 +940,9 @@ class TransferKPI(KPI):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        self.trips = None
-        self.routes = None
+        # route id of the gtfs trips, and short name of the gtfs routes
+        self.trip_routes = None
+        self.route_short_names = None
 
         # transfer variables
         self.current_walk_distance = 0
@@ -875,8 +957,9 @@ class TransferKPI(KPI):
 
     def _indicators_setup(self, simulation_model):
         if simulation_model.gtfs is not None:
-            self.trips = simulation_model.gtfs.trips
-            self.routes = simulation_model.gtfs.routes
+            gtfs = simulation_model.gtfs
+            self.trip_routes = get_column_mapping(gtfs.trips, "trip_id", "route_id")
+            self.route_short_names = get_column_mapping(gtfs.routes, "route_id", "route_short_name")
 
     def _init_keys(self):
         return [
@@ -895,6 +978,7 @@ class TransferKPI(KPI):
         pass
 
     def new_indicator_dict(self):
+        # the indicators of each row are built by write_variables
         return dict()
 
     def _update(self, event):
@@ -912,6 +996,16 @@ class TransferKPI(KPI):
             self.current_wait_time += sum(event.request.waitSequence)
 
         elif isinstance(event, StopEvent):
+            # stop browsing the served requests as soon as the agent is found
+            agent_id = self.agent.id
+            is_dropoff = any(request.agent.id == agent_id for request in event.dropoffs)
+
+            # ignore the stops where the agent is not served
+            if not is_dropoff and not any(
+                request.agent.id == agent_id for request in event.pickups
+            ):
+                return
+
             if isinstance(event.stop, StopPoint):
                 stop_id = event.stop.id
             elif isinstance(event.stop, UserStop):
@@ -919,14 +1013,11 @@ class TransferKPI(KPI):
             else:
                 stop_id = None
 
-            dropoff_agents = [request.agent.id for request in event.dropoffs]
-            pickup_agents = [request.agent.id for request in event.pickups]
-
-            if self.agent.id in dropoff_agents:
+            if is_dropoff:
                 self.from_trip = event.trip
                 self.from_stop = stop_id
 
-            elif self.agent.id in pickup_agents:
+            else:
                 self.to_trip = event.trip
                 self.to_stop = stop_id
 
@@ -947,21 +1038,22 @@ class TransferKPI(KPI):
         self.to_stop = None
 
     def write_variables(self):
-        self.indicator_dict[self.KEY_WALK_DIST] = self.current_walk_distance
-        self.indicator_dict[self.KEY_WALK_DURATION] = self.current_walk_duration
-        self.indicator_dict[self.KEY_WAIT_TIME] = self.current_wait_time
-        self.indicator_dict[self.KEY_FROM_ROUTE] = get_route_short_name_of_trip(
-            self.trips, self.routes, self.from_trip
-        )
-
-        self.indicator_dict[self.KEY_FROM_TRIP] = self.from_trip
-        self.indicator_dict[self.KEY_FROM_STOP] = self.from_stop
-        self.indicator_dict[self.KEY_TO_ROUTE] = get_route_short_name_of_trip(
-            self.trips, self.routes, self.to_trip
-        )
-
-        self.indicator_dict[self.KEY_TO_TRIP] = self.to_trip
-        self.indicator_dict[self.KEY_TO_STOP] = self.to_stop
+        # all the transfer indicators are set at once
+        self.indicator_dict = {
+            self.KEY_WALK_DIST: self.current_walk_distance,
+            self.KEY_WALK_DURATION: self.current_walk_duration,
+            self.KEY_WAIT_TIME: self.current_wait_time,
+            self.KEY_FROM_ROUTE: get_route_short_name_from_mapping(
+                self.trip_routes, self.route_short_names, self.from_trip
+            ),
+            self.KEY_FROM_TRIP: self.from_trip,
+            self.KEY_FROM_STOP: self.from_stop,
+            self.KEY_TO_ROUTE: get_route_short_name_from_mapping(
+                self.trip_routes, self.route_short_names, self.to_trip
+            ),
+            self.KEY_TO_TRIP: self.to_trip,
+            self.KEY_TO_STOP: self.to_stop,
+        }
         self.new_kpi_row()
 
 
@@ -1028,6 +1120,8 @@ class DestinationReachedKPI(KPI):
     #: **destinationReachedTime**: time when destination is reached, "NA" otherwise [seconds or NA]
     KEY_DESTINATION_REACHED = "destinationReachedTime"
 
+    EVENT_TYPES = (DestinationReachedEvent,)
+
     def new_indicator_dict(self):
         return {self.KEY_DESTINATION_REACHED: "NA"}
 
@@ -1050,6 +1144,8 @@ class LeaveSimulationKPI(KPI):
     #: **leaveSimulation**: code used when leaving the simulation (see model doc)
     KEY_LEAVE_SIMULATION = "leaveSimulation"
 
+    EVENT_TYPES = (LeaveSimulationEvent,)
+
     def new_indicator_dict(self):
         return {self.KEY_LEAVE_SIMULATION: None}
 
@@ -1064,6 +1160,23 @@ class LeaveSimulationKPI(KPI):
             self.indicator_dict[self.KEY_LEAVE_SIMULATION] = event.cause
 
 
+def get_column_mapping(table, key_column, value_column):
+    """
+    Build a dict that maps the values of a table column to the values of another column.
+
+    Like the get_*_of_trip table lookups, the first row of each key is used.
+    The resulting dicts are read by the get_*_from_mapping functions.
+
+    :param table: DataFrame
+    :param key_column: column containing the dict keys
+    :param value_column: column containing the dict values
+
+    :return: dict mapping each key to its value
+    """
+    table = table.drop_duplicates(key_column)
+    return dict(zip(table[key_column], table[value_column]))
+
+
 def get_route_id_of_trip(trips, trip_id, event):
     if trips is None:
         return event.serviceVehicle.operator
@@ -1107,6 +1220,34 @@ def get_route_short_name_of_trip(trips, routes, trip_id):
     return route_short_name
 
 
+def get_route_id_from_mapping(trip_routes, trip_id, event):
+    # if trips is not in the gtfs (on-demand trips for instance)
+    # try to get operator id
+    if trip_routes is None or trip_id not in trip_routes:
+        return event.serviceVehicle.operator
+
+    return trip_routes[trip_id]
+
+
+def get_direction_from_mapping(trip_directions, trip_id):
+    # ignore trips that are not in the gtfs (on-demand trips for instance)
+    if trip_directions is None or trip_id not in trip_directions:
+        return ""
+
+    return trip_directions[trip_id]
+
+
+def get_route_short_name_from_mapping(trip_routes, route_short_names, trip_id):
+    if trip_routes is None or route_short_names is None or trip_id is None:
+        return None
+
+    # ignore trips that are not in the gtfs (on-demand trips for instance)
+    if trip_id not in trip_routes:
+        return ""
+
+    return route_short_names[trip_routes[trip_id]]
+
+
 def get_stop_id_of_event(event):
     stop_id = None
 
@@ -198,9 +198,9 @@ class OutputFactory:
 
             # write the trace of the dynamic input
             outfile.write("\nTrace of dynamicInput")
-            for event in simulation_model.dynamicInput.trace.eventList:
-                outfile.write("\n")
-                outfile.write(str(event))
+            outfile.writelines(
+                "\n" + str(event) for event in simulation_model.dynamicInput.trace.eventList
+            )
 
             # write the trace of the simulation agents
             for agent in simulation_model.agentPopulation.get_total_population():
@@ -209,9 +209,7 @@ class OutputFactory:
                     continue
 
                 outfile.write("\nTrace of agent " + str(agent.id))
-                for event in agent.trace.eventList:
-                    outfile.write("\n")
-                    outfile.write(str(event))
+                outfile.writelines("\n" + str(event) for event in agent.trace.eventList)
 
         self.sim.outputFactory.new_output_file(filepath, "text/plain", content="traces")
 
@@ -126,6 +126,10 @@ class RouteEvent(MoveEvent):
         self.duration = sum(route_data["time"])
 
     def get_route_data_in_interval(self, start_time, end_time):
+        # the whole route is in the interval, summarise it as a single segment
+        if start_time == self.timestamp and end_time == self.timestamp + self.duration:
+            return {"time": [self.duration], "length": [self.distance]}
+
         durations = self.data["time"]
         distances = self.data["length"]
 
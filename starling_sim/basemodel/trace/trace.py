@@ -14,6 +14,8 @@ from starling_sim.utils.simulation_logging import TRACED_LOGGER, AGENT_LEVEL
 from starling_sim.basemodel.trace.events import LeaveSimulationEvent
 from starling_sim.utils.constants import END_OF_SIM_LEAVE
 
+from operator import attrgetter
+
 
 class Trace:
     """
@@ -28,13 +30,30 @@ class Trace:
         """
         self.eventList = []
 
+        # indicates if the events were added in chronological order
+        self.chronological = True
+
     def add_event(self, event):
         """
         :param event: Event object, describing the traced event
         :return:
         """
+        if self.chronological and self.eventList and event.timestamp < self.eventList[-1].timestamp:
+            self.chronological = False
         self.eventList.append(event)
 
+    def get_sorted_events(self):
+        """
+        Get the list of events sorted by timestamp.
+
+        The event list is only sorted if the events were not added in chronological order.
+
+        :return: list of events sorted by timestamp
+        """
+        if self.chronological:
+            return self.eventList
+        return sorted(self.eventList, key=attrgetter("timestamp"))
+
 
 class Traced:
     """
@@ -2,6 +2,8 @@ from starling_sim.basemodel.output.output_factory import OutputFactory
 from starling_sim.basemodel.output.kpi_output import KpiOutput
 from starling_sim.basemodel.output.kpis import (
     MoveKPI,
+    ChargeKPI,
+    PublicTransportChargeKPI,
 )
 from starling_sim.utils.constants import PUBLIC_TRANSPORT_TYPE
 
@@ -14,6 +16,19 @@ class Output(OutputFactory):
         move_kpi = MoveKPI()
         vehicles_kpi_output = KpiOutput(PUBLIC_TRANSPORT_TYPE, [move_kpi])
 
+        # vehicles charge at each stop, empty stops included
+        charge_kpi = ChargeKPI(non_empty_only=False)
+        charge_kpi_output = KpiOutput(PUBLIC_TRANSPORT_TYPE, [charge_kpi], kpi_name="charge_kpi")
+
+        public_transport_charge_kpi = PublicTransportChargeKPI(non_empty_only=False)
+        public_transport_charge_kpi_output = KpiOutput(
+            PUBLIC_TRANSPORT_TYPE,
+            [public_transport_charge_kpi],
+            kpi_name="public_transport_charge_kpi",
+        )
+
         self.kpi_outputs = [
             vehicles_kpi_output,
+            charge_kpi_output,
+            public_transport_charge_kpi_output,
         ]
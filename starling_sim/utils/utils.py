@@ -87,8 +87,9 @@ def json_dump(data, filepath):
     :return:
     """
 
+    # encode in one shot, which uses the C encoder unlike the chunked json.dump
     with open(filepath, "w") as outfile:
-        json.dump(data, outfile)
+        outfile.write(json.dumps(data))
 
 
 def json_pretty_dump(data, filepath):
@@ -119,6 +120,9 @@ def json_load(filepath):
 
 # compression utils
 
+#: gzip compression level of the outputs, faster than the default 9 for a slightly bigger file
+GZIP_COMPRESSION_LEVEL = 6
+
 
 def gz_compression(filepath, delete_source=True):
     """
@@ -133,7 +137,7 @@ def gz_compression(filepath, delete_source=True):
     # compress the file using gzip
     compressed_path = filepath + ".gz"
     with open(filepath, "rb") as f_in:
-        with gzip.open(compressed_path, "wb") as f_out:
+        with gzip.open(compressed_path, "wb", compresslevel=GZIP_COMPRESSION_LEVEL) as f_out:
             shutil.copyfileobj(f_in, f_out)
 
     # delete source file if asked
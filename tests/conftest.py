@@ -20,10 +20,22 @@ def pytest_addoption(parser):
     )
 
 
-# parameterize test_model_scenario test function
+# models whose test scenarios are also run with KPIs evaluated in several processes
+KPI_PROCESSES_TEST_MODELS = ["SB_VS_R"]
+
+
+# parameterize test_model_scenario test functions
 def pytest_generate_tests(metafunc):
     if metafunc.function.__name__ == "test_model_scenario":
         # list test scenarios present in the provided models' folders
         scenarios = get_test_scenarios(metafunc.config.getoption("models"))
 
         metafunc.parametrize("model, scenario", scenarios)
+
+    elif metafunc.function.__name__ == "test_model_scenario_with_kpi_processes":
+        # only keep the provided models that are tested with several kpi processes
+        models = metafunc.config.getoption("models") or KPI_PROCESSES_TEST_MODELS
+        models = [model for model in models if model in KPI_PROCESSES_TEST_MODELS]
+        scenarios = get_test_scenarios(models) if models else []
+
+        metafunc.parametrize("model, scenario", scenarios)
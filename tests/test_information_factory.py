@@ -0,0 +1,72 @@
+"""
+Test the geojson information factories
+"""
+
+from starling_sim.basemodel.output.information_factory import DelayInformation
+from starling_sim.basemodel.trace.events import InputEvent, StopEvent
+from starling_sim.basemodel.agent.requests import StopPoint
+
+from types import SimpleNamespace
+import pandas as pd
+import numpy as np
+
+
+def timetable_operator():
+    """
+    Build a fake public transport operator with a small timetable.
+
+    The timetable contains a missing departure time and a stop served twice by the same trip.
+    """
+
+    stop_times = pd.DataFrame(
+        {
+            "trip_id": ["T1", "T1", "T1", "T1", "T1"],
+            "stop_id": ["S1", "S2", "S2", "S3", "S3"],
+            "departure_time": ["08:00:00", np.nan, "08:10:00", "08:20:00", "08:30:00"],
+        }
+    )
+    service_info = SimpleNamespace(get_stop_times=lambda: stop_times)
+
+    return SimpleNamespace(id="OPR", service_info=service_info)
+
+
+def stop_event(operator, stop_id, pickup_time):
+    """
+    Build a StopEvent of trip T1 at the given stop, with the given pickup time.
+    """
+
+    event = StopEvent(pickup_time, operator, None, "T1", StopPoint(None, stop_id))
+    event.set_pickups([], pickup_time)
+    return event
+
+
+def test_delay_departure_times():
+    """
+    Missing departure times are ignored and the first departure of a stop is kept.
+    """
+    operator = timetable_operator()
+    information = DelayInformation()
+
+    departure_times = information.get_departure_times(operator)
+
+    assert departure_times == {("T1", "S1"): 28800, ("T1", "S2"): 29400, ("T1", "S3"): 30000}
+    assert information.get_departure_times(operator) is departure_times
+
+
+def test_delay_values():
+    """
+    Delays are the truncated minutes between the pickup time and the theoretical departure.
+    """
+    operator = timetable_operator()
+    agent = SimpleNamespace(operator=operator)
+    information = DelayInformation()
+
+    information.update(InputEvent(0, agent), agent)
+    information.update(stop_event(operator, "S1", 28950), agent)
+    information.update(stop_event(operator, "S2", 29400), agent)
+    information.update(stop_event(operator, "S3", 29910), agent)
+
+    assert information.get_dict() == {
+        "values": [0, "+2", "0", "-1"],
+        "timestamps": [0, 28950, 29400, 29910],
+    }
@@ -0,0 +1,89 @@
+"""
+Test the KPIs that are not covered by the model test scenarios
+"""
+
+from starling_sim.basemodel.output.kpi_output import KpiOutput
+from starling_sim.basemodel.output.kpis import TransferKPI
+from starling_sim.basemodel.trace.events import (
+    InputEvent,
+    MoveEvent,
+    WaitEvent,
+    StopEvent,
+    DestinationReachedEvent,
+)
+from starling_sim.basemodel.trace.trace import Trace
+from starling_sim.basemodel.agent.requests import StopPoint, UserStop
+
+from types import SimpleNamespace
+import pandas as pd
+
+
+def gtfs_tables():
+    """
+    Build the trips and routes tables of a small gtfs feed.
+    """
+
+    trips = pd.DataFrame({"trip_id": ["T1", "T2"], "route_id": ["R1", "R2"]})
+    routes = pd.DataFrame({"route_id": ["R1", "R2"], "route_short_name": ["L1", "L2"]})
+
+    return SimpleNamespace(trips=trips, routes=routes)
+
+
+def served_stop_event(time, user, trip, stop, pickup):
+    """
+    Build a StopEvent where the given user is picked up or dropped off.
+    """
+
+    event = StopEvent(time, None, None, trip, stop)
+    served = [SimpleNamespace(agent=user)]
+    if pickup:
+        event.set_pickups(served, time)
+    else:
+        event.set_dropoffs(served, time)
+
+    return event
+
+
+def test_transfer_kpi():
+    """
+    Each pickup and the destination close a transfer, whose from/to values are reset afterwards.
+    """
+    user = SimpleNamespace(id="u0", trace=Trace())
+    other_user = SimpleNamespace(id="u1")
+    user_stop = UserStop(UserStop.GET_REQUEST, None, "req", stop_point_id="S3")
+
+    events = [
+        InputEvent(0, user),
+        MoveEvent(0, 200, 150, "walk"),
+        WaitEvent(150, "wait", 60),
+        served_stop_event(210, user, "T1", StopPoint(None, "S1"), True),
+        served_stop_event(300, other_user, "T1", StopPoint(None, "S5"), False),
+        MoveEvent(210, 3000, 400, "bus"),
+        served_stop_event(610, user, "T1", StopPoint(None, "S2"), False),
+        MoveEvent(610, 100, 80, "walk"),
+        WaitEvent(690, "wait", 30),
+        served_stop_event(720, user, "T2", user_stop, True),
+        served_stop_event(900, user, "T2", StopPoint(None, "S4"), False),
+        MoveEvent(900, 50, 40, "walk"),
+        DestinationReachedEvent(940),
+    ]
+    for event in events:
+        user.trace.add_event(event)
+
+    simulation_model = SimpleNamespace(
+        scenario={"kpi_time_profile": False, "limit": 1000},
+        gtfs=gtfs_tables(),
+        agentPopulation={"users": {user.id: user}},
+    )
+    kpi_output = KpiOutput("users", [TransferKPI()])
+    kpi_output.setup("transfer_kpi.csv", "", simulation_model)
+
+    table = kpi_output.build_kpi_table()
+
+    # compare the csv content, as written in the kpi output files
+    assert table.to_csv(sep=";", index=False).splitlines() == [
+        "agentId;walkDistance;walkDuration;waitTime;fromRoute;fromTrip;fromStop;toRoute;toTrip;toStop",
+        "u0;200;150;60;;;;L1;T1;S1",
+        "u0;100;80;30;L1;T1;S2;L2;T2;S3",
+        "u0;50;40;0;L2;T2;S4;;;",
+    ]
@@ -3,6 +3,7 @@ Test Starling models
 """
 
 from starling_sim.utils.testing import run_model_test
+from starling_sim.utils.config import config
 
 
 def test_model_scenario(model, scenario):
@@ -10,3 +11,13 @@ def test_model_scenario(model, scenario):
     Run a test scenario. See utils.testing.py for more information.
     """
     assert run_model_test(model, scenario)
+
+
+def test_model_scenario_with_kpi_processes(model, scenario, monkeypatch):
+    """
+    Run a test scenario with the agents KPIs evaluated in two processes.
+
+    The outputs must match the same reference files as the serial evaluation.
+    """
+    monkeypatch.setitem(config, "kpi_processes", 2)
+    assert run_model_test(model, scenario)